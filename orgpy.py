@@ -1,90 +1,259 @@
 #!/usr/bin/env python3
-import argparse
+import errno
 import os
+import shutil
+import sys
+import tempfile
+from typing import Optional
 
-# Directory mapping, maps file extensions to directories
-dir_map = {'.txt': 'Docs', '.pdf': 'Docs' + os.sep + 'PDF'}
+# Directory mapping, maps lowercase file extensions (without the dot)
+# to directories. A single literal, built in one go at import time
+dir_map = {
+    # Docs
+    'txt': 'Docs',
+    # PDF
+    'pdf': 'Docs' + os.sep + 'PDF',
+    # Word files
+    'doc': 'Docs' + os.sep + 'Word',
+    'docx': 'Docs' + os.sep + 'Word',
+    'odt': 'Docs' + os.sep + 'Word',
+    'rtf': 'Docs' + os.sep + 'Word',
+    # Sheets
+    'ods': 'Docs' + os.sep + 'Sheets',
+    'xls': 'Docs' + os.sep + 'Sheets',
+    'xlsm': 'Docs' + os.sep + 'Sheets',
+    'xlsx': 'Docs' + os.sep + 'Sheets',
+    # Presentations
+    'key': 'Docs' + os.sep + 'Presentations',
+    'odp': 'Docs' + os.sep + 'Presentations',
+    'pps': 'Docs' + os.sep + 'Presentations',
+    'ppt': 'Docs' + os.sep + 'Presentations',
+    'pptx': 'Docs' + os.sep + 'Presentations',
+    # Images
+    'ai': 'Images', 'bmp': 'Images', 'gif': 'Images', 'ico': 'Images',
+    'jpeg': 'Images', 'jpg': 'Images', 'png': 'Images', 'ps': 'Images',
+    'psd': 'Images', 'svg': 'Images', 'tif': 'Images', 'tiff': 'Images',
+    # Audio
+    'aif': 'Audio', 'cda': 'Audio', 'mid': 'Audio', 'mp3': 'Audio',
+    'mpa': 'Audio', 'ogg': 'Audio', 'wav': 'Audio', 'wma': 'Audio',
+    'wpl': 'Audio',
+    # Videos
+    '3g2': 'Videos', '3gp': 'Videos', 'avi': 'Videos', 'flv': 'Videos',
+    'h264': 'Videos', 'm4v': 'Videos', 'mkv': 'Videos', 'mov': 'Videos',
+    'mp4': 'Videos', 'mpg': 'Videos', 'rm': 'Videos', 'swf': 'Videos',
+    'vob': 'Videos', 'wmv': 'Videos',
+    # Archives
+    '7z': 'Archives', 'arj': 'Archives', 'bz2': 'Archives', 'gz': 'Archives',
+    'lz4': 'Archives', 'rar': 'Archives', 'tar': 'Archives', 'xz': 'Archives',
+    'z': 'Archives', 'zip': 'Archives', 'zstd': 'Archives',
+    # Programs
+    'apk': 'Programs', 'bin': 'Programs', 'deb': 'Programs', 'exe': 'Programs',
+    'jar': 'Programs', 'msi': 'Programs', 'rpm': 'Programs',
+    # Code
+    'c': 'Code', 'cpp': 'Code', 'java': 'Code', 'py': 'Code', 'js': 'Code',
+    'class': 'Code', 'h': 'Code', 'sh': 'Code', 'bat': 'Code', 'css': 'Code',
+    'go': 'Code', 'rs': 'Code', 'cs': 'Code', 'swift': 'Code', 'r': 'Code',
+    'php': 'Code', 'dart': 'Code', 'kt': 'Code', 'mat': 'Code', 'pl': 'Code',
+    'rb': 'Code', 'scala': 'Code',
+    # Markup
+    'md': 'Code' + os.sep + 'Markup',
+    'html': 'Code' + os.sep + 'Markup',
+    'xml': 'Code' + os.sep + 'Markup',
+    'xhtml': 'Code' + os.sep + 'Markup',
+    'mhtml': 'Code' + os.sep + 'Markup',
+    # Database
+    'sql': 'Code' + os.sep + 'Database',
+    'db': 'Code' + os.sep + 'Database',
+    'json': 'Code' + os.sep + 'Database',
+    'csv': 'Code' + os.sep + 'Database',
+}
 
-# Word files
-dir_map.update(dict.fromkeys(
-    ['.doc', '.docx', '.odt', 'rtf'], 'Docs' + os.sep + 'Word'))
+# Output lines buffered before they are written, keeps progress visible
+batch_size = 256
 
-# Sheets
-dir_map.update(dict.fromkeys(
-    ['.ods', '.xls', '.xlsm', '.xlsx'], 'Docs' + os.sep + 'Sheets'))
 
-# Presentations
-dir_map.update(dict.fromkeys(
-    ['.key', '.odp', '.pps', '.ppt', '.pptx'], 'Docs' + os.sep + 'Presentations'))
+# Move a file onto another filesystem, failing where a rename would
+def copy_across(src: str, dst: str) -> None:
+    # Copy next to the destination first, a failed copy never leaves a
+    # partial file under the real name
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dst))
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp)
+        shutil.copystat(src, tmp)
+        # Overwrites a file but fails on a directory, same as os.replace
+        os.replace(tmp, dst)
+    except OSError:
+        os.unlink(tmp)
+        raise
 
-# Images
-dir_map.update(dict.fromkeys(['.ai', '.bmp', '.gif', '.ico', '.jpeg',
-                              '.jpg', '.png', '.ps', '.psd', '.svg', '.tif', '.tiff'], 'Images'))
+    try:
+        os.unlink(src)
+    except OSError:
+        os.unlink(dst)  # Keep the original, report the move as skipped
+        raise
 
-# Audio
-dir_map.update(dict.fromkeys(
-    ['.aif', '.cda', '.mid', '.mp3', '.mpa', '.ogg', '.wav', '.wma', '.wpl'], 'Audio'))
 
-# Videos
-dir_map.update(dict.fromkeys(['.3g2', '.3gp', '.avi', '.flv', '.h264', '.m4v',
-                              '.mkv', '.mov', '.mp4', '.mpg', '.rm', '.swf', '.vob', '.wmv'], 'Videos'))
+# Move files of one category, yields the lines to report in batches
+def move_files(path: str, dest_dir: str, files: list, dir_fd: Optional[int] = None):
+    # Resolve and create each destination once, not once per file
+    dest_path = os.path.join(path, dest_dir)
+    try:
+        os.makedirs(dest_path, exist_ok=True)
+    except OSError:
+        pass  # Moves into it fail below and are reported as skipped
 
-# Archives
-dir_map.update(dict.fromkeys(['.7z', '.arj', '.bz2',  '.gz', '.lz4',
-                              '.rar', '.tar', '.xz', '.z', '.zip', '.zstd'], 'Archives'))
+    dest_fd = None
+    if dir_fd is not None:
+        try:
+            dest_fd = os.open(dest_dir, os.O_RDONLY | os.O_DIRECTORY,
+                              dir_fd=dir_fd)
+        except OSError:
+            pass
 
-# Programs
-dir_map.update(dict.fromkeys(
-    ['.apk', '.bin', '.deb', '.exe', '.jar', '.msi', '.rpm'], 'Programs'))
+    # Joined once, so each file only needs a string concatenation
+    src_prefix = os.path.join(path, "")
+    dest_prefix = os.path.join(dest_path, "")
+    moved_prefix = " -> " + os.path.join(dest_dir, "")
 
-# Code
-dir_map.update(dict.fromkeys(['.c', '.cpp', '.java', '.py', '.js', '.class', '.h', '.sh', '.bat', '.css',
-                              '.go', '.rs', '.cs', '.swift', '.r', '.php', '.dart', '.kt', '.mat', '.pl', '.rb', '.scala'], 'Code'))
+    # Buffer output for the caller to write in batches, no print per file
+    lines = []
+    try:
+        for file in files:
+            try:
+                try:
+                    if dest_fd is None:
+                        os.replace(src_prefix + file, dest_prefix + file)
+                    else:
+                        # Same overwrite semantics as os.replace on POSIX
+                        os.rename(file, file, src_dir_fd=dir_fd,
+                                  dst_dir_fd=dest_fd)
+                except OSError as error:
+                    if error.errno != errno.EXDEV:
+                        raise
 
-# Markup
-dir_map.update(dict.fromkeys(
-    ['.md', '.html', '.xml', '.xhtml', '.mhtml'], 'Code' + os.sep + 'Markup'))
+                    # Destination is on another filesystem, copy it across
+                    copy_across(src_prefix + file, dest_prefix + file)
 
-# Database
-dir_map.update(dict.fromkeys(
-    ['.sql', '.db', '.json', '.csv'], 'Code' + os.sep + 'Database'))
+                lines.append("Moved: " + file + moved_prefix + file + "\n")
+            except OSError:
+                lines.append("Skipped: " + file + "\n")
 
-# Initialize parser
-parser = argparse.ArgumentParser(prog="orgpy", description="Organize yor digital mess.",
-                                 epilog="Visit github.com/2KAbhishek/orgpy for more.")
+            if len(lines) >= batch_size:
+                yield lines
+                lines = []
+    finally:
+        if dest_fd is not None:
+            os.close(dest_fd)
 
-# Optional path
-parser.add_argument("-p", "--path", metavar="path", type=str, default=os.getcwd(),
-                    help="The directory path to organize.")
+    if lines:
+        yield lines
 
-args = parser.parse_args()
 
-# Use current dir if path is not specified or incorrect
-path = os.getcwd()
+# Main organize method
+def organize(path: str, jobs: int = 1) -> None:
+    # Categories are known up front, so appends need no missing-key check
+    files_by_dir = {dest_dir: [] for dest_dir in dir_map.values()}
+    skipped = []
 
-if args.path and os.path.exists(args.path):
-    path = args.path
+    with os.scandir(path) as entries:
+        for entry in entries:
+            file = entry.name
+            # Leading dots never start an extension, as in splitext ('..pdf')
+            head, _, ext = file.rpartition('.')
+            dest_dir = dir_map.get(ext.lower()) if head.strip('.') else None
 
+            # Directory entry type comes from the scan, no extra stat needed
+            if dest_dir is None or not entry.is_file(follow_symlinks=False):
+                skipped.append("Skipped: " + file + "\n")
+                if len(skipped) >= batch_size:
+                    sys.stdout.writelines(skipped)
+                    skipped.clear()
+                continue
+
+            files_by_dir[dest_dir].append(file)
+
+    sys.stdout.writelines(skipped)
+
+    # Rename relative to directory descriptors where supported,
+    # so full paths are not resolved again for every file
+    dir_fd = None
+    if os.rename in os.supports_dir_fd and hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+
+    moves = [(dest_dir, files)
+             for dest_dir, files in files_by_dir.items() if files]
+
+    try:
+        if jobs > 1 and len(moves) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            # Categories move into separate directories, run them side by side
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                # Each worker drains its generator, so the moves run there
+                futures = [executor.submit(list, move_files(path, dest_dir, files, dir_fd))
+                           for dest_dir, files in moves]
+                # Workers only return lines, the main thread owns stdout and
+                # writes them in submission order, grouped by category
+                for future in futures:
+                    for lines in future.result():
+                        sys.stdout.writelines(lines)
+        else:
+            # Written batch by batch, so a large category shows progress
+            for dest_dir, files in moves:
+                for lines in move_files(path, dest_dir, files, dir_fd):
+                    sys.stdout.writelines(lines)
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+
+
+# Parse command line arguments into the path to organize and job count
+def parse_args(argv: Optional[list] = None) -> tuple:
+    argv = sys.argv[1:] if argv is None else argv
+
+    # No flags, use the defaults without loading argparse at all
+    if not argv:
+        return os.getcwd(), 1
+
+    import argparse
+
+    # Initialize parser
+    parser = argparse.ArgumentParser(prog="orgpy", description="Organize yor digital mess.",
+                                     epilog="Visit github.com/2KAbhishek/orgpy for more.")
+
+    # Optional path
+    parser.add_argument("-p", "--path", metavar="path", type=str, default=os.getcwd(),
+                        help="The directory path to organize.")
+
+    # Optional parallelism
+    parser.add_argument("-j", "--jobs", metavar="jobs", type=int, default=1,
+                        help="Number of categories to move in parallel, 1 or more.")
+
+    args = parser.parse_args(argv)
+
+    if args.jobs < 1:
+        parser.error("argument -j/--jobs: must be 1 or more")
+
+    # Use current dir if path is not specified or incorrect
+    path = os.getcwd()
+
+    if args.path and os.path.exists(args.path):
+        path = args.path
+
+    return path, args.jobs
 
-# Main organize method
-def organize(path: str) -> None:
-    for file in os.listdir(path):
-        file_name, ext = os.path.splitext(os.path.join(path, file))
-        try:
-            if not os.path.exists(os.path.join(path, dir_map[ext])):
-                os.makedirs(os.path.join(path, dir_map[ext]))
 
-            os.replace(os.path.join(path, file),
-                       os.path.join(path, dir_map[ext], file))
+# Entry point, asks before organizing
+def main() -> None:
+    path, jobs = parse_args()
 
-            print("Moved: " + file + " -> " +
-                  os.path.join(dir_map[ext], file))
-        except:
-            print("Skipped: " + file)
+    if input("Organize directory: " + os.path.basename(path) + " ? -> ") in ['y', 'Y', 'yes', 'Yes']:
+        organize(path, jobs)
+        print(os.listdir(path))
+    else:
+        print("OK, Bye!")
 
 
-if input("Organize directory: " + os.path.basename(path) + " ? -> ") in ['y', 'Y', 'yes', 'Yes']:
-    organize(path)
-    print(os.listdir(path))
-else:
-    print("OK, Bye!")
+if __name__ == "__main__":
+    main()